@@ -0,0 +1,30 @@
+"""add indexes for bulk delete
+
+Revision ID: 3c7e9a1d5b20
+Revises: 8b91329c0243
+Create Date: 2026-10-19 10:12:44.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e9a1d5b20'
+down_revision: Union[str, Sequence[str], None] = '8b91329c0243'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_comments_document_id'), 'comments', ['document_id'], unique=False)
+    op.create_index(op.f('ix_documents_created_at'), 'documents', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_documents_created_at'), table_name='documents')
+    op.drop_index(op.f('ix_comments_document_id'), table_name='comments')
@@ -0,0 +1,39 @@
+"""store cloudinary locators in file_path
+
+Revision ID: 5e2b7c4a9d13
+Revises: 3c7e9a1d5b20
+Create Date: 2026-10-19 14:02:31.507214
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b7c4a9d13'
+down_revision: Union[str, Sequence[str], None] = '3c7e9a1d5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Troca a URL pública salva em file_path pelo localizador cloudinary://upload/<public_id>."""
+    op.execute(sa.text(
+        "UPDATE documents SET file_path = 'cloudinary://upload/' || cloudinary_id "
+        "WHERE cloudinary_id IS NOT NULL AND file_path LIKE 'https://res.cloudinary.com/%'"
+    ))
+
+
+def downgrade() -> None:
+    """Reconstrói as URLs públicas (sem versão) a partir do public_id."""
+    cloud_name = os.getenv("CLOUDNARY_CLOUD_NAME")
+    if not cloud_name:
+        raise RuntimeError("Configure CLOUDNARY_CLOUD_NAME para reconstruir as URLs")
+    op.execute(sa.text(
+        "UPDATE documents SET file_path = "
+        "'https://res.cloudinary.com/' || :cloud_name || '/image/upload/' || cloudinary_id || '.' || file_type "
+        "WHERE file_path LIKE 'cloudinary://upload/%'"
+    ).bindparams(cloud_name=cloud_name))
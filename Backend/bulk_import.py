@@ -0,0 +1,437 @@
+"""
+Importação em massa de documentos e comentários.
+
+Carrega os metadados de um manifesto CSV via COPY em tabelas temporárias e
+faz o merge com um único INSERT ... ON CONFLICT por lote. Opcionalmente envia
+os arquivos de um diretório local para o storage em paralelo.
+
+Uso:
+    python bulk_import.py documents manifesto.csv [--files-dir DIR]
+    python bulk_import.py comments manifesto.csv
+
+Colunas aceitas:
+    documents: id, title, description, file, file_path, file_type, cloudinary_id, created_at
+    comments:  id, document_id, content, created_at
+
+A importação é retomável: o progresso é salvo em um arquivo de estado após
+cada lote, e os IDs ausentes são derivados do conteúdo da linha (uuid5), então
+reexecutar um lote já importado não duplica registros. Linhas rejeitadas
+(arquivo local sem --files-dir, falha no upload, metadados incompletos) são
+gravadas em `<manifesto>.rejects.csv`, que pode ser reimportado como manifesto.
+Linhas com file_path precisam de file_type e cloudinary_id; IDs precisam ser
+UUIDs e created_at uma data ISO 8601. Comentários de documentos inexistentes e
+documentos com título repetido no manifesto também vão para os rejeitos.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import select
+
+from database import get_engine, new_session
+from documents.storage import CloudinaryStorage, get_storage
+from documents.models import Document
+from documents.services import ALLOWED_TYPES, MAX_FILE_SIZE
+
+
+IMPORT_NAMESPACE = uuid.UUID("7d1f4c3e-2b8a-4f6e-9c1d-5a0b3e8f2d71")
+
+EXTENSIONS = {"jpeg": "jpg", **{ext: ext for ext in ALLOWED_TYPES.values()}}
+
+DOCUMENT_COLUMNS = ("id", "title", "description", "file_path", "file_type", "cloudinary_id", "created_at")
+COMMENT_COLUMNS = ("id", "document_id", "content", "created_at")
+
+DOCUMENT_STAGING = """
+    CREATE TEMP TABLE IF NOT EXISTS staging_documents (
+        id uuid,
+        title varchar(255),
+        description text,
+        file_path varchar(500),
+        file_type varchar(50),
+        cloudinary_id varchar(255),
+        created_at timestamptz
+    ) ON COMMIT DELETE ROWS
+"""
+
+DOCUMENT_MERGE = """
+    INSERT INTO documents (id, title, description, file_path, file_type, cloudinary_id, created_at)
+    SELECT DISTINCT ON (s.title)
+        s.id, s.title, s.description, s.file_path, s.file_type, s.cloudinary_id,
+        COALESCE(s.created_at, now())
+    FROM staging_documents s
+    WHERE NOT EXISTS (SELECT 1 FROM documents d WHERE d.title = s.title)
+    ORDER BY s.title
+    ON CONFLICT (id) DO NOTHING
+"""
+
+COMMENT_STAGING = """
+    CREATE TEMP TABLE IF NOT EXISTS staging_comments (
+        id uuid,
+        document_id uuid,
+        content text,
+        created_at timestamptz
+    ) ON COMMIT DELETE ROWS
+"""
+
+COMMENT_MERGE = """
+    INSERT INTO comments (id, document_id, content, created_at)
+    SELECT s.id, s.document_id, s.content, COALESCE(s.created_at, now())
+    FROM staging_comments s
+    JOIN documents d ON d.id = s.document_id
+    ON CONFLICT (id) DO NOTHING
+"""
+
+# Linhas da staging que não estão na tabela final depois do merge
+DOCUMENT_DROPPED = """
+    SELECT s.id FROM staging_documents s
+    WHERE NOT EXISTS (SELECT 1 FROM documents d WHERE d.id = s.id)
+"""
+
+COMMENT_DROPPED = """
+    SELECT s.id FROM staging_comments s
+    WHERE NOT EXISTS (SELECT 1 FROM comments c WHERE c.id = s.id)
+"""
+
+# Limites das colunas; valores maiores fariam o COPY falhar e travar o lote
+MAX_LENGTHS = {"title": 255, "file_path": 500, "cloudinary_id": 255}
+
+
+def _blank_to_none(value: str | None) -> str | None:
+    if value is None:
+        return None
+    value = value.strip()
+    return value or None
+
+
+def _parse_uuid(value: str | None) -> uuid.UUID | None:
+    """Converte o valor em UUID; levanta ValueError se for inválido."""
+    return uuid.UUID(value) if value is not None else None
+
+
+def _parse_timestamp(value: str | None) -> str | None:
+    """Valida uma data ISO 8601 e a devolve normalizada; levanta ValueError se for inválida."""
+    return datetime.fromisoformat(value).isoformat() if value is not None else None
+
+
+def _upload_local_file(files_dir: str, row: dict) -> tuple[dict | None, str | None]:
+    """Envia o arquivo local da linha para o storage e completa os metadados."""
+    path = os.path.join(files_dir, row["file"])
+    extension = EXTENSIONS.get(os.path.splitext(path)[1].lstrip(".").lower())
+    if extension is None:
+        return None, "tipo não permitido"
+
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    except OSError as e:
+        return None, f"erro ao ler arquivo: {e}"
+    if len(content) > MAX_FILE_SIZE:
+        return None, "arquivo muito grande (máx 10MB)"
+
+    try:
+        upload_result = get_storage().upload(content, str(row["id"]), extension)
+    except Exception as e:
+        return None, f"erro ao enviar: {e}"
+
+    return {
+        **row,
+        "file_path": upload_result["secure_url"],
+        "file_type": extension,
+        "cloudinary_id": upload_result["public_id"],
+    }, None
+
+
+def _prepare_documents(
+    rows: list[dict],
+    files_dir: str | None,
+    workers: int,
+) -> tuple[list[dict], list[tuple[dict, str]]]:
+    """
+    Normaliza as linhas, descarta títulos existentes e envia os arquivos locais.
+
+    Retorna as linhas prontas para o merge e as rejeitadas, com o motivo.
+    """
+    prepared = []
+    rejected = []
+    for row in rows:
+        title = _blank_to_none(row.get("title"))
+        if title is None:
+            rejected.append((row, "título ausente"))
+            continue
+        try:
+            document_id = _parse_uuid(_blank_to_none(row.get("id"))) or uuid.uuid5(IMPORT_NAMESPACE, title)
+        except ValueError:
+            rejected.append((row, "id não é um UUID válido"))
+            continue
+        try:
+            created_at = _parse_timestamp(_blank_to_none(row.get("created_at")))
+        except ValueError:
+            rejected.append((row, "created_at inválido (use ISO 8601)"))
+            continue
+
+        document = {
+            "source": row,
+            "id": document_id,
+            "title": title,
+            "description": _blank_to_none(row.get("description")),
+            "file": _blank_to_none(row.get("file")),
+            "file_path": _blank_to_none(row.get("file_path")),
+            "file_type": _blank_to_none(row.get("file_type")),
+            "cloudinary_id": _blank_to_none(row.get("cloudinary_id")),
+            "created_at": created_at,
+        }
+        too_long = [
+            column for column, limit in MAX_LENGTHS.items()
+            if document[column] is not None and len(document[column]) > limit
+        ]
+        if too_long:
+            rejected.append((row, f"valor muito longo em {', '.join(too_long)}"))
+            continue
+        prepared.append(document)
+
+    # Evita enviar arquivos cujo título já existe; eles seriam descartados no merge
+    with new_session() as db:
+        existing = set(db.scalars(
+            select(Document.title).where(Document.title.in_([row["title"] for row in prepared]))
+        ))
+
+    ready = []
+    pending = []
+    for row in prepared:
+        if row["title"] in existing:
+            continue
+        if row["file_path"] is None:
+            if not row["file"]:
+                rejected.append((row["source"], "sem file_path nem file"))
+            elif files_dir is None:
+                rejected.append((row["source"], "arquivo local sem --files-dir"))
+            else:
+                pending.append(row)
+        elif row["file_type"] not in EXTENSIONS.values():
+            rejected.append((row["source"], "file_type ausente ou inválido"))
+        elif row["cloudinary_id"] is None:
+            rejected.append((row["source"], "cloudinary_id ausente"))
+        elif row["file_path"].startswith("https://res.cloudinary.com/"):
+            # Arquivo já enviado como público: guarda o localizador, não a URL
+            ready.append({**row, "file_path": CloudinaryStorage.locator(row["cloudinary_id"], "upload")})
+        else:
+            ready.append(row)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for row, (uploaded, error) in zip(pending, executor.map(lambda row: _upload_local_file(files_dir, row), pending)):
+                if uploaded is None:
+                    rejected.append((row["source"], error))
+                else:
+                    ready.append(uploaded)
+
+    return ready, rejected
+
+
+def _prepare_comments(rows: list[dict]) -> tuple[list[dict], list[tuple[dict, str]]]:
+    """Normaliza e valida as linhas de comentários, derivando o ID quando ausente."""
+    prepared = []
+    rejected = []
+    for row in rows:
+        content = _blank_to_none(row.get("content"))
+        try:
+            document_id = _parse_uuid(_blank_to_none(row.get("document_id")))
+            comment_id = _parse_uuid(_blank_to_none(row.get("id")))
+        except ValueError:
+            rejected.append((row, "id ou document_id não é um UUID válido"))
+            continue
+        if document_id is None or content is None:
+            rejected.append((row, "document_id ou content ausente"))
+            continue
+        try:
+            created_at = _parse_timestamp(_blank_to_none(row.get("created_at")))
+        except ValueError:
+            rejected.append((row, "created_at inválido (use ISO 8601)"))
+            continue
+
+        prepared.append({
+            "source": row,
+            "id": comment_id or uuid.uuid5(
+                IMPORT_NAMESPACE,
+                f"{_blank_to_none(row.get('document_id'))}:{_blank_to_none(row.get('created_at'))}:{content}",
+            ),
+            "document_id": document_id,
+            "content": content,
+            "created_at": created_at,
+        })
+    return prepared, rejected
+
+
+def _write_rejects(rejects_path: str, fieldnames: list[str], rejected: list[tuple[dict, str]]) -> None:
+    """
+    Anexa as linhas rejeitadas ao arquivo de rejeitos, com a coluna `reason`.
+
+    O arquivo tem as mesmas colunas do manifesto e pode ser reimportado depois
+    de corrigido (ex.: com --files-dir ou após uma falha do storage).
+    """
+    write_header = not os.path.exists(rejects_path)
+    with open(rejects_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=[*fieldnames, "reason"], extrasaction="ignore")
+        if write_header:
+            writer.writeheader()
+        for row, reason in rejected:
+            writer.writerow({**row, "reason": reason})
+
+
+def _copy_and_merge(
+    staging_sql: str,
+    table: str,
+    columns: tuple[str, ...],
+    merge_sql: str,
+    dropped_sql: str,
+    rows: list[dict],
+) -> tuple[int, set[str]]:
+    """
+    Carrega as linhas via COPY na tabela temporária e faz o merge em uma transação.
+
+    Retorna o número de linhas inseridas e os IDs que o merge descartou.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[column] is None else row[column] for column in columns])
+    buffer.seek(0)
+
+    connection = get_engine().raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(staging_sql)
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(merge_sql)
+            inserted = cursor.rowcount
+            cursor.execute(dropped_sql)
+            dropped = {str(row[0]) for row in cursor.fetchall()}
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    return inserted, dropped
+
+
+def _load_state(state_path: str, kind: str, manifest: str) -> int:
+    if not os.path.exists(state_path):
+        return 0
+    with open(state_path) as f:
+        state = json.load(f)
+    if state.get("kind") != kind or state.get("manifest") != os.path.abspath(manifest):
+        return 0
+    return state.get("rows_done", 0)
+
+
+def _save_state(state_path: str, kind: str, manifest: str, rows_done: int) -> None:
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"kind": kind, "manifest": os.path.abspath(manifest), "rows_done": rows_done}, f)
+    os.replace(tmp_path, state_path)
+
+
+def run_import(
+    kind: str,
+    manifest: str,
+    files_dir: str | None = None,
+    batch_size: int = 1000,
+    workers: int = 8,
+    state_path: str | None = None,
+    rejects_path: str | None = None,
+) -> int:
+    """
+    Importa o manifesto em lotes, retomando do último lote confirmado.
+
+    Linhas que não puderam ser importadas vão para o arquivo de rejeitos
+    antes de o checkpoint avançar, então nenhuma linha é perdida.
+    """
+    state_path = state_path or f"{manifest}.state.json"
+    rejects_path = rejects_path or f"{manifest}.rejects.csv"
+    rows_done = _load_state(state_path, kind, manifest)
+    if rows_done:
+        print(f"Retomando a partir da linha {rows_done}")
+
+    inserted_total = 0
+    rejected_total = 0
+    started = time.monotonic()
+    processed = 0
+
+    with open(manifest, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for _ in islice(reader, rows_done):
+            pass
+
+        while batch := list(islice(reader, batch_size)):
+            if kind == "documents":
+                rows, rejected = _prepare_documents(batch, files_dir, workers)
+                inserted, dropped = _copy_and_merge(
+                    DOCUMENT_STAGING, "staging_documents", DOCUMENT_COLUMNS, DOCUMENT_MERGE, DOCUMENT_DROPPED, rows
+                )
+                reason = "título duplicado no manifesto ou já existente"
+            else:
+                rows, rejected = _prepare_comments(batch)
+                inserted, dropped = _copy_and_merge(
+                    COMMENT_STAGING, "staging_comments", COMMENT_COLUMNS, COMMENT_MERGE, COMMENT_DROPPED, rows
+                )
+                reason = "documento não encontrado"
+            rejected += [(row["source"], reason) for row in rows if str(row["id"]) in dropped]
+
+            if rejected:
+                _write_rejects(rejects_path, reader.fieldnames, rejected)
+
+            rows_done += len(batch)
+            processed += len(batch)
+            inserted_total += inserted
+            rejected_total += len(rejected)
+            _save_state(state_path, kind, manifest, rows_done)
+
+            elapsed = time.monotonic() - started
+            print(
+                f"{rows_done} linhas processadas, {inserted_total} inseridas, "
+                f"{rejected_total} rejeitadas ({processed / elapsed:.0f} linhas/s)"
+            )
+
+    elapsed = time.monotonic() - started
+    print(f"Concluído: {inserted_total} {kind} inseridos em {elapsed:.1f}s")
+    if rejected_total:
+        print(f"{rejected_total} linha(s) rejeitada(s) gravadas em {rejects_path}")
+    return inserted_total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importação em massa de documentos e comentários")
+    parser.add_argument("kind", choices=["documents", "comments"])
+    parser.add_argument("manifest", help="Arquivo CSV com os metadados")
+    parser.add_argument("--files-dir", help="Diretório com os arquivos referenciados na coluna 'file'")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=8, help="Uploads paralelos para o storage")
+    parser.add_argument("--state", help="Arquivo de estado para retomar a importação")
+    parser.add_argument("--rejects", help="Arquivo CSV onde gravar as linhas rejeitadas")
+    args = parser.parse_args()
+
+    run_import(
+        kind=args.kind,
+        manifest=args.manifest,
+        files_dir=args.files_dir,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        state_path=args.state,
+        rejects_path=args.rejects,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,8 @@ class Comment(Base):
     document_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("documents.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     content: Mapped[str] = mapped_column(Text, nullable=False)
@@ -1,4 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
 import math
@@ -10,12 +12,19 @@ from .schema.dtos import (
     CommentListResponseSchema
 )
 from database import get_db
+from fieldsets import parse_fields
+from ratelimit import limit_comments
 
 
 router = APIRouter(prefix="/documents/{document_id}/comments", tags=["comments"])
 
 
-@router.post("/", response_model=CommentResponseSchema, status_code=201)
+@router.post(
+    "/",
+    response_model=CommentResponseSchema,
+    status_code=201,
+    dependencies=[Depends(limit_comments)],
+)
 def create_comment(
     document_id: UUID,
     schema: CommentCreateSchema,
@@ -40,6 +49,7 @@ def list_comments(
     document_id: UUID,
     page: int = 1,
     page_size: int = 20,
+    fields: str | None = None,
     db: Session = Depends(get_db),
 ):
     """
@@ -48,26 +58,33 @@ def list_comments(
     - **document_id**: ID do documento
     - **page**: Página atual (padrão: 1)
     - **page_size**: Itens por página (padrão: 20, máx: 100)
+    - **fields**: Campos de cada comentário, separados por vírgula (ex: `id,content`)
     """
     if page_size > 100:
         page_size = 100
     
-    comments, total = CommentService.list_comments(
+    selected = parse_fields(fields, CommentResponseSchema)
+    comments, total = CommentService.list_comments_shared(
         db=db,
         document_id=document_id,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        fields=selected
     )
     
     total_pages = math.ceil(total / page_size) if total > 0 else 0
     
-    return {
+    response = {
         "comments": comments,
         "total": total,
         "page": page,
         "page_size": page_size,
         "total_pages": total_pages,
     }
+    if selected:
+        # Itens parciais não passam pelo response_model
+        return JSONResponse(jsonable_encoder(response))
+    return response
 
 
 @router.get("/{comment_id}", response_model=CommentResponseSchema)
@@ -2,12 +2,13 @@ import uuid
 from typing import Sequence
 
 from fastapi import HTTPException
-from sqlalchemy import select, func, exists
+from sqlalchemy import RowMapping, select, func, exists
 from sqlalchemy.orm import Session
 
 from .schema.dtos import CommentResponseSchema
 from .models import Comment
 from documents.models import Document 
+from singleflight import reads
 
 
 class CommentService:
@@ -42,8 +43,9 @@ class CommentService:
         document_id: uuid.UUID,
         page: int = 1,
         page_size: int = 20,
-    ) -> tuple[Sequence[Comment], int]:
-        """Listar comentários de um documento com paginação"""
+        fields: Sequence[str] | None = None,
+    ) -> tuple[Sequence[Comment] | Sequence[RowMapping], int]:
+        """Listar comentários de um documento com paginação (opcionalmente só `fields`)"""
         
         if not db.scalar(select(exists().where(Document.id == document_id))):
             raise HTTPException(status_code=404, detail="Documento não encontrado")
@@ -53,14 +55,16 @@ class CommentService:
 
         offset = (page - 1) * page_size
 
+        columns = [getattr(Comment, field) for field in fields] if fields else [Comment]
         stmt = (
-            select(Comment)
+            select(*columns)
             .where(Comment.document_id == document_id)
             .order_by(Comment.created_at.desc())
             .offset(offset)
             .limit(page_size)
         )
-        comments = db.execute(stmt).scalars().all()
+        result = db.execute(stmt)
+        comments = result.mappings().all() if fields else result.scalars().all()
 
         total = db.scalar(
             select(func.count())
@@ -69,6 +73,26 @@ class CommentService:
         )
 
         return comments, total
+
+    @staticmethod
+    def list_comments_shared(
+        db: Session,
+        document_id: uuid.UUID,
+        page: int = 1,
+        page_size: int = 20,
+        fields: Sequence[str] | None = None,
+    ) -> tuple[Sequence[Comment] | Sequence[RowMapping], int]:
+        """Listar comentários agrupando listagens simultâneas da mesma página"""
+        
+        def load() -> tuple[Sequence[Comment] | Sequence[RowMapping], int]:
+            comments, total = CommentService.list_comments(db, document_id, page, page_size, fields)
+            if not fields:
+                for comment in comments:
+                    db.expunge(comment)
+            return comments, total
+        
+        key = ("comments", document_id, page, page_size, tuple(fields or ()))
+        return reads.do(key, load)
     
     @staticmethod
     def get_comment(
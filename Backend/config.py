@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,5 +10,31 @@ class Settings(BaseModel):
     cloudinary_api_key: str = os.getenv("CLOUDNARY_API_KEY")
     cloudinary_api_secret: str = os.getenv("CLOUDNARY_API_SECRET")
     cloudinary_cloud_name: str = os.getenv("CLOUDNARY_CLOUD_NAME")
+    cloudinary_auth_token_key: str | None = os.getenv("CLOUDNARY_AUTH_TOKEN_KEY")
+    delivery_url_ttl: int = int(os.getenv("DELIVERY_URL_TTL", "3600"))
+    db_pool_warmup: int = int(os.getenv("DB_POOL_WARMUP", "2"))
+    storage_backend: str = os.getenv("STORAGE_BACKEND", "cloudinary")
+    local_storage_dir: str = os.getenv("LOCAL_STORAGE_DIR", "uploads")
+    public_base_url: str = os.getenv("PUBLIC_BASE_URL", "http://127.0.0.1:8000")
+    # Limite dos uploads retomáveis. O Cloudinary recebe tudo como imagem, e o
+    # plano gratuito aceita imagens de até 10MB; o storage local não tem esse teto.
+    max_resumable_file_size: int = int(
+        os.getenv("MAX_RESUMABLE_FILE_SIZE")
+        or (500 if os.getenv("STORAGE_BACKEND") == "local" else 10) * 1024 * 1024
+    )
+    upload_spool_dir: str = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "rmh-uploads"))
+    rate_limit_store: str = os.getenv("RATE_LIMIT_STORE", "memory")
+    # Header com o IP real do cliente, preenchido pelo proxy (ex.: X-Forwarded-For no Render)
+    client_ip_header: str | None = os.getenv("CLIENT_IP_HEADER") or None
+    rate_limit_sqlite_path: str = os.getenv("RATE_LIMIT_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "rmh-ratelimit.sqlite3"))
+    upload_rate_per_minute: int = int(os.getenv("UPLOAD_RATE_PER_MINUTE", "10"))
+    upload_burst: int = int(os.getenv("UPLOAD_BURST", "5"))
+    comment_rate_per_minute: int = int(os.getenv("COMMENT_RATE_PER_MINUTE", "30"))
+    comment_burst: int = int(os.getenv("COMMENT_BURST", "10"))
+    max_concurrent_uploads: int = int(os.getenv("MAX_CONCURRENT_UPLOADS", "4"))
+    max_queued_uploads: int = int(os.getenv("MAX_QUEUED_UPLOADS", "8"))
+    upload_queue_timeout: float = float(os.getenv("UPLOAD_QUEUE_TIMEOUT", "5"))
+    compression_min_size: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    signing_secret: str | None = os.getenv("SIGNING_SECRET") or os.getenv("CLOUDNARY_API_SECRET")
 
 settings = Settings()
\ No newline at end of file
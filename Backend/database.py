@@ -1,17 +1,39 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from functools import cache
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from config import settings
 
 class Base(DeclarativeBase):
     pass
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-local_session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+local_session = sessionmaker(autocommit=False, autoflush=False)
+
+@cache
+def get_engine() -> Engine:
+    """Cria o engine sob demanda, para não pagar o custo no import."""
+    return create_engine(settings.database_url, pool_pre_ping=True)
+
+def new_session() -> Session:
+    return local_session(bind=get_engine())
+
+def warm_up_pool(connections: int) -> None:
+    """Abre conexões antecipadamente para que as primeiras requisições não paguem o handshake."""
+    engine = get_engine()
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        # Devolve ao pool mesmo se uma conexão posterior falhar
+        for connection in opened:
+            connection.close()
 
 def get_db():
-    db = local_session()
+    db = new_session()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,79 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from config import settings
+from fieldsets import parse_list
+from .models import Document
+from .storage import DELIVERY_PRESETS, get_storage
+
+
+class DeliveryUrlService:
+    """
+    Gera URLs de entrega assinadas por documento e preset, memorizadas até perto de expirar.
+
+    O cache é por processo e limitado em `max_entries` (LRU). Uma URL só é
+    reaproveitada enquanto ainda tiver pelo menos 10% da validade pela frente,
+    para que o cliente não receba um link prestes a expirar.
+
+    No Cloudinary, `preview` e `attachment` sempre expiram; `thumbnail` só
+    expira com CLOUDNARY_AUTH_TOKEN_KEY configurada, e sem ela o `ttl` é apenas
+    o intervalo de renovação do cache para esse preset.
+    """
+
+    def __init__(self, ttl: int, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._urls: OrderedDict[tuple[uuid.UUID, str], tuple[str, int]] = OrderedDict()
+
+    @staticmethod
+    def _legacy_url(document: Document, preset: str) -> str:
+        """
+        URL de documentos antigos, cujo `file_path` é a URL pública do arquivo.
+
+        Sem o localizador não é possível assinar nem aplicar a transformação do
+        preset; só o download ganha a flag de anexo quando a URL é do Cloudinary.
+        """
+        if preset == "attachment" and "/upload/" in document.file_path:
+            return document.file_path.replace("/upload/", "/upload/fl_attachment/", 1)
+        return document.file_path
+
+    def get_url(self, document: Document, preset: str) -> str:
+        if document.file_path.startswith(("http://", "https://")):
+            return self._legacy_url(document, preset)
+
+        now = time.time()
+        key = (document.id, preset)
+        with self._lock:
+            cached = self._urls.get(key)
+            if cached and cached[1] - now > self.ttl / 10:
+                self._urls.move_to_end(key)
+                return cached[0]
+
+        expires_at = int(now) + self.ttl
+        url = get_storage().delivery_url(document.file_path, document.file_type, preset, expires_at)
+
+        with self._lock:
+            self._urls[key] = (url, expires_at)
+            self._urls.move_to_end(key)
+            while len(self._urls) > self.max_entries:
+                self._urls.popitem(last=False)
+        return url
+
+    def get_urls(self, document: Document, presets: list[str]) -> dict[str, str]:
+        return {preset: self.get_url(document, preset) for preset in presets}
+
+    def invalidate(self, document_id: uuid.UUID) -> None:
+        with self._lock:
+            for preset in DELIVERY_PRESETS:
+                self._urls.pop((document_id, preset), None)
+
+
+def parse_presets(presets: str | None) -> list[str]:
+    """Interpreta o parâmetro `presets=` (lista separada por vírgulas)."""
+    return parse_list(presets, DELIVERY_PRESETS, "Presets") or []
+
+
+delivery_urls = DeliveryUrlService(settings.delivery_url_ttl)
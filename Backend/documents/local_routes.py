@@ -0,0 +1,59 @@
+import time
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import FileResponse
+
+from documents import signing
+from documents.storage import get_storage
+
+
+router = APIRouter(prefix="/storage/local", tags=["storage"])
+
+
+@router.post("/upload/{public_id:path}", status_code=201)
+def upload_file(
+    public_id: str,
+    expires: int = Form(...),
+    signature: str = Form(...),
+    file: UploadFile = File(...),
+):
+    """
+    Recebe um arquivo enviado com ticket de upload direto (stand-in local do Cloudinary)
+    """
+    if expires < time.time() or not signing.verify_value("put", f"{public_id}:{expires}", signature):
+        raise HTTPException(status_code=403, detail="Assinatura inválida ou expirada")
+
+    try:
+        get_storage().save(public_id, file.file)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="public_id inválido")
+
+    return {"public_id": public_id}
+
+
+@router.get("/{public_id:path}")
+def get_file(
+    public_id: str,
+    download: bool = False,
+    expires: int | None = None,
+    signature: str | None = None,
+):
+    """
+    Serve um arquivo do storage local; exige URL assinada e dentro da validade
+    """
+    if (
+        expires is None
+        or signature is None
+        or expires < time.time()
+        or not signing.verify_value("get", f"{public_id}:{expires}", signature)
+    ):
+        raise HTTPException(status_code=403, detail="Assinatura inválida ou expirada")
+
+    try:
+        path = get_storage().path(public_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+    return FileResponse(path, filename=path.name if download else None)
@@ -1,15 +1,36 @@
-from fastapi import APIRouter, Depends, File, Form, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, Form, Header, Query, Request, Response, UploadFile, HTTPException
 from sqlalchemy.orm import Session
-from fastapi.responses import RedirectResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, RedirectResponse
 from database import get_db
-from documents.schema.dtos import DocumentResponseSchema, DocumentListResponseSchema, DocumentCreateSchema
+from documents.schema.dtos import (
+    DocumentResponseSchema,
+    DocumentListResponseSchema,
+    DocumentFullResponseSchema,
+    DocumentCreateSchema,
+    DocumentBulkDeleteSchema,
+    DocumentBulkDeleteResponseSchema,
+    DocumentUploadTicketRequestSchema,
+    DocumentUploadTicketSchema,
+    DocumentFinalizeSchema,
+    UploadSessionCreateSchema,
+    UploadSessionSchema,
+)
 from documents.services import DocumentService
+from documents.uploads import UploadSessionService
+from fieldsets import parse_fields
+from ratelimit import limit_uploads, upload_limiter
+from documents.delivery import delivery_urls, parse_presets
 from uuid import UUID
-from cloudinary.utils import cloudinary_url
 router = APIRouter(prefix="/documents", tags=["documents"])
 
 
-@router.post("/", response_model=DocumentResponseSchema, status_code=201)
+@router.post(
+    "/",
+    response_model=DocumentResponseSchema,
+    status_code=201,
+    dependencies=[Depends(limit_uploads), Depends(upload_limiter.slot)],
+)
 def create_document(
     title: str = Form(..., min_length=1, max_length=255),
     description: str | None = Form(None, max_length=1000),
@@ -39,27 +60,192 @@ def create_document(
     return document
 
 
+@router.post(
+    "/upload-url",
+    response_model=DocumentUploadTicketSchema,
+    status_code=201,
+    dependencies=[Depends(limit_uploads)],
+)
+def create_upload_url(
+    schema: DocumentUploadTicketRequestSchema,
+    db: Session = Depends(get_db),
+):
+    """
+    Gerar ticket assinado para upload direto ao storage
+    
+    - **title**: Título do documento (obrigatório)
+    - **description**: Descrição opcional do documento
+    - **content_type**: application/pdf, image/png ou image/jpeg
+    
+    O cliente envia o arquivo para `upload_url` com os `fields` retornados
+    e depois chama `POST /documents/{document_id}/finalize` com o `token`.
+    """
+    return DocumentService.create_upload_ticket(
+        db=db,
+        title=schema.title,
+        description=schema.description,
+        content_type=schema.content_type
+    )
+
+
+@router.post("/{document_id}/finalize", response_model=DocumentResponseSchema, status_code=201)
+def finalize_upload(
+    document_id: UUID,
+    schema: DocumentFinalizeSchema,
+    db: Session = Depends(get_db),
+):
+    """
+    Confirmar upload direto e salvar os metadados do documento
+    
+    - **document_id**: ID reservado em `POST /documents/upload-url`
+    - **token**: Token do ticket de upload
+    """
+    return DocumentService.finalize_upload(db, document_id, schema.token)
+
+
+@router.post(
+    "/uploads",
+    response_model=UploadSessionSchema,
+    status_code=201,
+    dependencies=[Depends(limit_uploads)],
+)
+def create_upload_session(
+    schema: UploadSessionCreateSchema,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    """
+    Criar sessão de upload retomável (estilo tus)
+    
+    - **title**: Título do documento (obrigatório)
+    - **description**: Descrição opcional do documento
+    - **content_type**: application/pdf, image/png ou image/jpeg
+    - **length**: Tamanho total do arquivo em bytes (máx MAX_RESUMABLE_FILE_SIZE)
+    
+    Envie os trechos com `PATCH /documents/uploads/{session_id}` e conclua
+    com `POST /documents/uploads/{session_id}/finalize`.
+    """
+    session = UploadSessionService.create_session(
+        db=db,
+        title=schema.title,
+        description=schema.description,
+        content_type=schema.content_type,
+        length=schema.length
+    )
+    response.headers["Location"] = f"{router.prefix}/uploads/{session['session_id']}"
+    response.headers["Upload-Offset"] = "0"
+    return session
+
+
+@router.head("/uploads/{session_id}")
+def get_upload_offset(session_id: UUID):
+    """
+    Consultar quantos bytes da sessão já foram recebidos (header Upload-Offset)
+    """
+    session = UploadSessionService.get_session(session_id)
+    return Response(headers={
+        "Upload-Offset": str(session["offset"]),
+        "Upload-Length": str(session["length"]),
+        "Cache-Control": "no-store",
+    })
+
+
+@router.patch("/uploads/{session_id}", status_code=204, dependencies=[Depends(upload_limiter.slot)])
+async def upload_chunk(
+    session_id: UUID,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+):
+    """
+    Enviar um trecho do arquivo a partir de Upload-Offset
+    
+    O corpo deve ser `application/offset+octet-stream` com os bytes do trecho.
+    Em caso de falha, consulte o offset com HEAD e reenvie a partir dele.
+    """
+    if request.headers.get("content-type") != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Use Content-Type application/offset+octet-stream")
+
+    offset = await UploadSessionService.append_chunk(session_id, upload_offset, request.stream())
+    return Response(status_code=204, headers={"Upload-Offset": str(offset)})
+
+
+@router.post(
+    "/uploads/{session_id}/finalize",
+    response_model=DocumentResponseSchema,
+    status_code=201,
+    dependencies=[Depends(upload_limiter.slot)],
+)
+def finalize_upload_session(
+    session_id: UUID,
+    db: Session = Depends(get_db),
+):
+    """
+    Concluir upload retomável: envia o arquivo ao storage e cria o documento
+    """
+    return UploadSessionService.finalize_session(db, session_id)
+
+
+@router.post("/bulk-delete", response_model=DocumentBulkDeleteResponseSchema)
+def bulk_delete_documents(
+    schema: DocumentBulkDeleteSchema,
+    db: Session = Depends(get_db),
+):
+    """
+    Deletar vários documentos de uma vez
+    
+    - **ids**: Lista de IDs dos documentos (máx 10000)
+    
+    Remove em lotes, com comentários e arquivos do Cloudinary apagados em massa.
+    """
+    deleted = set(DocumentService.bulk_delete_documents(db, schema.ids))
+    not_found = [document_id for document_id in dict.fromkeys(schema.ids) if document_id not in deleted]
+    
+    return {"deleted": len(deleted), "not_found": not_found}
+
+
 @router.get("/", response_model=DocumentListResponseSchema)
 def list_documents(
     page: int = 1,
     page_size: int = 10,
+    fields: str | None = None,
+    presets: str | None = None,
     db: Session = Depends(get_db),
 ):
     """
     Listar documentos com paginação.
+    
+    - **fields**: Campos de cada documento, separados por vírgula (ex: `id,title,created_at,file_type`)
+    - **presets**: URLs de entrega a incluir em `urls` (thumbnail, preview, attachment)
     """
-    documents, total = DocumentService.list_documents(db, page, page_size)
+    selected = parse_fields(fields, DocumentResponseSchema)
+    wanted = parse_presets(presets)
+    # As URLs dependem de colunas fora de `fields`, então com presets a linha vem inteira
+    documents, total = DocumentService.list_documents(db, page, page_size, None if wanted else selected)
+    
+    if wanted:
+        include = set(selected) if selected else None
+        documents = [
+            {
+                **DocumentResponseSchema.model_validate(document).model_dump(include=include),
+                "urls": delivery_urls.get_urls(document, wanted),
+            }
+            for document in documents
+        ]
     
     import math
     total_pages = math.ceil(total / page_size)
     
-    return {
+    response = {
         "documents": documents,
         "total": total,
         "page": page,
         "page_size": page_size,
         "total_pages": total_pages,
     }
+    if selected:
+        # Itens parciais não passam pelo response_model
+        return JSONResponse(jsonable_encoder(response))
+    return response
 
 
 @router.get("/{document_id}", response_model=DocumentResponseSchema)
@@ -70,24 +256,44 @@ def get_document(
     """
     Buscar documento por ID.
     """
-    document = DocumentService.get_document(db, document_id)
+    document = DocumentService.get_document_shared(db, document_id)
     if not document:
         raise HTTPException(status_code=404, detail="Documento não encontrado")
     return document
 
+@router.get("/{document_id}/full", response_model=DocumentFullResponseSchema)
+def get_document_full(
+    document_id: UUID,
+    comments_page_size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Buscar documento com a primeira página de comentários, o total de
+    comentários e as URLs de visualização/download, em uma única consulta.
+    
+    - **document_id**: ID do documento
+    - **comments_page_size**: Comentários na primeira página (padrão: 20, máx: 100)
+    """
+    result = DocumentService.get_document_full(db, document_id, comments_page_size)
+    if not result:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    
+    document, comments, comment_total = result
+    return {
+        "document": document,
+        "comments": comments,
+        "comment_total": comment_total,
+        "view_url": delivery_urls.get_url(document, "preview"),
+        "download_url": delivery_urls.get_url(document, "attachment"),
+    }
+
 @router.get("/{document_id}/view")
 def view_document(document_id: UUID, db: Session = Depends(get_db)):
-    document = DocumentService.get_document(db, document_id)
+    document = DocumentService.get_document_shared(db, document_id)
     if not document:
         raise HTTPException(status_code=404, detail="Documento não encontrado")
 
-    url, _ = cloudinary_url(
-        document.cloudinary_id,
-        resource_type="image",
-        type="upload",   
-    )
-
-    return RedirectResponse(url=url)
+    return RedirectResponse(url=delivery_urls.get_url(document, "preview"))
 
 @router.get("/{document_id}/download")
 def download_document(
@@ -95,13 +301,13 @@ def download_document(
     db: Session = Depends(get_db),
 ):
     """
-    Força o download do arquivo (adiciona flag fl_attachment na URL do Cloudinary)
+    Força o download do arquivo (preset attachment, flag fl_attachment no Cloudinary)
     """
-    document = DocumentService.get_document(db, document_id)
+    document = DocumentService.get_document_shared(db, document_id)
     if not document:
         raise HTTPException(status_code=404, detail="Documento não encontrado")
     
-    download_url = document.file_path.replace("/upload/", "/upload/fl_attachment/")
+    download_url = delivery_urls.get_url(document, "attachment")
     
     return RedirectResponse(url=download_url)
 
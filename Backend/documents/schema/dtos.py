@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, field_validator
 from uuid import UUID
 from datetime import datetime
+from comments.schema.dtos import CommentResponseSchema
 
 class DocumentCreateSchema(BaseModel):
     title: str = Field(
@@ -30,6 +31,39 @@ class DocumentCreateSchema(BaseModel):
         return v
 
 
+class DocumentUploadTicketRequestSchema(DocumentCreateSchema):
+    content_type: str = Field(
+        ...,
+        description="Tipo do arquivo (application/pdf, image/png ou image/jpeg)"
+    )
+
+
+class DocumentUploadTicketSchema(BaseModel):
+    document_id: UUID
+    upload_url: str
+    fields: dict[str, str | int]
+    expires_at: int
+    token: str
+
+
+class DocumentFinalizeSchema(BaseModel):
+    token: str
+
+
+class UploadSessionCreateSchema(DocumentUploadTicketRequestSchema):
+    length: int = Field(
+        ...,
+        gt=0,
+        description="Tamanho total do arquivo em bytes"
+    )
+
+
+class UploadSessionSchema(BaseModel):
+    session_id: UUID
+    offset: int
+    length: int
+
+
 class DocumentResponseSchema(BaseModel):
     id: UUID
     title: str
@@ -41,9 +75,35 @@ class DocumentResponseSchema(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class DocumentListItemSchema(DocumentResponseSchema):
+    urls: dict[str, str] | None = None
+
+
+class DocumentFullResponseSchema(BaseModel):
+    document: DocumentResponseSchema
+    comments: list[CommentResponseSchema]
+    comment_total: int
+    view_url: str
+    download_url: str
+
+
 class DocumentListResponseSchema(BaseModel):
-    documents: list[DocumentResponseSchema]
+    documents: list[DocumentListItemSchema]
     total: int
     page: int
     page_size: int
-    total_pages: int
\ No newline at end of file
+    total_pages: int
+
+
+class DocumentBulkDeleteSchema(BaseModel):
+    ids: list[UUID] = Field(
+        ...,
+        min_length=1,
+        max_length=10000,
+        description="IDs dos documentos a serem deletados"
+    )
+
+
+class DocumentBulkDeleteResponseSchema(BaseModel):
+    deleted: int
+    not_found: list[UUID]
\ No newline at end of file
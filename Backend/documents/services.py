@@ -1,24 +1,22 @@
+import time
 import uuid
-from typing import Sequence
+from datetime import datetime
+from typing import Callable, Sequence
 from contextlib import contextmanager
 
 from fastapi import UploadFile, HTTPException
-from sqlalchemy import exists, select, func
+from sqlalchemy import RowMapping, delete, exists, literal_column, select, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from .schema.dtos import DocumentResponseSchema
 from .models import Document
-import cloudinary
-import cloudinary.uploader
-from config import settings
-
-
-cloudinary.config(
-    cloud_name=settings.cloudinary_cloud_name,
-    api_key=settings.cloudinary_api_key,
-    api_secret=settings.cloudinary_api_secret
-)
+from comments.models import Comment
+from .storage import get_storage
+from .delivery import delivery_urls
+from . import signing
+from singleflight import reads
 
 
 ALLOWED_TYPES = {
@@ -29,19 +27,27 @@ ALLOWED_TYPES = {
 
 MAX_FILE_SIZE = 10 * 1024 * 1024 
 
+DELETE_BATCH_SIZE = 500
+
+# Validade dos tickets de upload direto, em segundos
+UPLOAD_TICKET_TTL = 15 * 60
+
 
 class DocumentService:
     
     @staticmethod
     @contextmanager
-    def _upload_transaction(db: Session, cloudinary_id: str):
+    def _upload_transaction(db: Session, cloudinary_id: str, document_id: uuid.UUID | None = None):
         """Gerencia transação: rollback no DB + limpeza no Cloudinary se falhar"""
         try:
             yield
             db.commit()
         except IntegrityError as e:
             db.rollback()
-            cloudinary.uploader.destroy(cloudinary_id)
+            if document_id is not None and db.get(Document, document_id) is not None:
+                # Outra finalização do mesmo ticket já salvou o documento; o arquivo é dela
+                raise HTTPException(status_code=409, detail="Upload já finalizado")
+            get_storage().destroy(cloudinary_id)
             
             if 'title' in str(e.orig).lower():
                 raise HTTPException(status_code=409, detail="Título já existe")
@@ -49,7 +55,7 @@ class DocumentService:
             
         except Exception as e:
             db.rollback()
-            cloudinary.uploader.destroy(cloudinary_id)
+            get_storage().destroy(cloudinary_id)
             raise HTTPException(status_code=500, detail=f"Erro ao salvar: {str(e)}")
     
     @staticmethod
@@ -78,16 +84,23 @@ class DocumentService:
         file_id = str(uuid.uuid4())
         file_extension = ALLOWED_TYPES[file.content_type]
 
-        upload_result = cloudinary.uploader.upload(
-            content,
-            public_id=file_id,
-            resource_type="image",
-            folder="documents",
-            format=file_extension
-        )
-            
-        with DocumentService._upload_transaction(db, upload_result['public_id']):
+        upload_result = get_storage().upload(content, file_id, file_extension)
+
+        return DocumentService._save_document(db, title, description, file_extension, upload_result)
+
+    @staticmethod
+    def _save_document(
+        db: Session,
+        title: str,
+        description: str | None,
+        file_extension: str,
+        upload_result: dict,
+        document_id: uuid.UUID | None = None,
+    ) -> Document:
+        """Persiste os metadados de um arquivo já enviado ao storage."""
+        with DocumentService._upload_transaction(db, upload_result['public_id'], document_id):
             document = Document(
+                id=document_id,
                 title=title,
                 description=description,
                 file_path=upload_result['secure_url'],
@@ -103,25 +116,118 @@ class DocumentService:
 
         return document
 
+    @staticmethod
+    def create_upload_ticket(
+        db: Session,
+        title: str,
+        description: str | None,
+        content_type: str,
+    ) -> dict:
+        """
+        Gera um ticket assinado para o cliente enviar o arquivo direto ao storage.
+
+        O ID do documento é reservado aqui; o registro só é criado em
+        `finalize_upload`, depois que o arquivo estiver no storage.
+        """
+        if db.scalar(select(exists().where(Document.title == title))):
+            raise HTTPException(status_code=409, detail="Título já existe")
+
+        if content_type not in ALLOWED_TYPES:
+            raise HTTPException(status_code=400, detail="Tipo não permitido. Use PDF, PNG ou JPG")
+
+        document_id = uuid.uuid4()
+        file_extension = ALLOWED_TYPES[content_type]
+        expires_at = int(time.time()) + UPLOAD_TICKET_TTL
+
+        ticket = get_storage().create_upload_ticket(str(document_id), file_extension, expires_at)
+        token = signing.sign({
+            "document_id": str(document_id),
+            "title": title,
+            "description": description,
+            "file_type": file_extension,
+            "public_id": ticket["public_id"],
+        }, expires_at)
+
+        return {
+            "document_id": document_id,
+            "upload_url": ticket["upload_url"],
+            "fields": ticket["fields"],
+            "expires_at": expires_at,
+            "token": token,
+        }
+
+    @staticmethod
+    def finalize_upload(db: Session, document_id: uuid.UUID, token: str) -> Document:
+        """
+        Confirma um upload direto: valida o ticket, confere o arquivo no storage
+        e persiste os metadados.
+        """
+        payload = signing.verify(token)
+        if payload is None or payload["document_id"] != str(document_id):
+            raise HTTPException(status_code=400, detail="Ticket inválido ou expirado")
+
+        document = DocumentService.get_document(db, document_id)
+        if document:
+            return document
+
+        storage = get_storage()
+        resource = storage.get_resource(payload["public_id"])
+        if resource is None:
+            raise HTTPException(status_code=400, detail="Arquivo não encontrado no storage")
+
+        if resource["bytes"] > MAX_FILE_SIZE or resource["format"] != payload["file_type"]:
+            storage.destroy(payload["public_id"])
+            raise HTTPException(status_code=400, detail="Arquivo inválido (PDF, PNG ou JPG, máx 10MB)")
+
+        existing = db.scalar(select(Document).where(Document.title == payload["title"]))
+        if existing:
+            # Uma finalização simultânea do mesmo ticket pode ter acabado de salvar
+            if existing.id == document_id:
+                return existing
+            storage.destroy(payload["public_id"])
+            raise HTTPException(status_code=409, detail="Título já existe")
+
+        try:
+            return DocumentService._save_document(
+                db,
+                payload["title"],
+                payload["description"],
+                payload["file_type"],
+                {"public_id": payload["public_id"], "secure_url": resource["secure_url"]},
+                document_id=document_id,
+            )
+        except HTTPException:
+            document = DocumentService.get_document(db, document_id)
+            if document:
+                return document
+            raise
+
     @staticmethod
     def list_documents(
         db: Session,
         page: int = 1,
         page_size: int = 10,
-    ) -> tuple[Sequence[Document], int]:
-        """Lista documentos de forma paginada, ordenados por data de criação (desc)."""
+        fields: Sequence[str] | None = None,
+    ) -> tuple[Sequence[Document] | Sequence[RowMapping], int]:
+        """
+        Lista documentos de forma paginada, ordenados por data de criação (desc).
+
+        Com `fields`, apenas essas colunas são buscadas e os itens vêm como mappings.
+        """
         if page < 1:
             page = 1
 
         offset = (page - 1) * page_size
 
+        columns = [getattr(Document, field) for field in fields] if fields else [Document]
         stmt = (
-            select(Document)
+            select(*columns)
             .order_by(Document.created_at.desc())
             .offset(offset)
             .limit(page_size)
         )
-        documents = db.execute(stmt).scalars().all()
+        result = db.execute(stmt)
+        documents = result.mappings().all() if fields else result.scalars().all()
 
         total = db.scalar(select(func.count()).select_from(Document))
 
@@ -131,7 +237,71 @@ class DocumentService:
     def get_document(db: Session, document_id: uuid.UUID) -> Document | None:
         """Busca um documento específico pelo ID."""
         return db.scalar(select(Document).where(Document.id == document_id))
+
+    @staticmethod
+    def get_document_shared(db: Session, document_id: uuid.UUID) -> Document | None:
+        """
+        Busca um documento para leitura, agrupando buscas simultâneas pelo mesmo ID.
+
+        O objeto retornado é desanexado da sessão e pode ser compartilhado entre
+        requisições; use `get_document` quando for alterá-lo.
+        """
+        def load() -> Document | None:
+            document = DocumentService.get_document(db, document_id)
+            if document:
+                db.expunge(document)
+            return document
+
+        return reads.do(("document", document_id), load)
     
+    @staticmethod
+    def get_document_full(
+        db: Session,
+        document_id: uuid.UUID,
+        page_size: int = 20,
+    ) -> tuple[Document, list[dict], int] | None:
+        """
+        Busca o documento, a primeira página de comentários e o total de
+        comentários em uma única consulta.
+
+        A página vem agregada em JSON (json_agg) e o total em uma subquery
+        escalar, evitando as idas separadas ao banco do fluxo documento +
+        listagem de comentários. Buscas simultâneas pelo mesmo documento são
+        agrupadas.
+        """
+        page = (
+            select(Comment.id, Comment.document_id, Comment.content, Comment.created_at)
+            .where(Comment.document_id == document_id)
+            .order_by(Comment.created_at.desc())
+            .limit(page_size)
+            .subquery("page")
+        )
+        comments = select(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(page.table_valued(), page.c.created_at.desc())),
+                literal_column("'[]'::json"),
+            )
+        ).scalar_subquery()
+        comment_total = (
+            select(func.count())
+            .select_from(Comment)
+            .where(Comment.document_id == document_id)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(Document, comments.label("comments"), comment_total.label("comment_total"))
+            .where(Document.id == document_id)
+        )
+
+        def load() -> tuple[Document, list[dict], int] | None:
+            row = db.execute(stmt).one_or_none()
+            if row is None:
+                return None
+            db.expunge(row.Document)
+            return row.Document, row.comments, row.comment_total
+
+        return reads.do(("document_full", document_id, page_size), load)
+
     @staticmethod
     def delete_document(db: Session, document_id: uuid.UUID) -> bool:
         """Deletar documento do banco e do Cloudinary"""
@@ -140,12 +310,98 @@ class DocumentService:
             return False
         
         try:
-            resource_type = "raw" if document.file_type == "pdf" else "image"
-            cloudinary.uploader.destroy(public_id=document.cloudinary_id, resource_type=resource_type, invalidate=True)
+            # Todos os tipos (inclusive PDF) são enviados como resource_type "image"
+            get_storage().destroy(document.cloudinary_id)
         except Exception as e:
             print(f"Erro ao deletar do Cloudinary: {e}")
         
         db.delete(document)
         db.commit()
+        delivery_urls.invalidate(document_id)
         return True
-    
+
+    @staticmethod
+    def _delete_batch(
+        db: Session,
+        document_ids: Sequence[uuid.UUID],
+        on_storage_error: Callable[[list[str], Exception], None] | None = None,
+    ) -> list[uuid.UUID]:
+        """
+        Deleta um lote de documentos em statements set-based e limpa o Cloudinary.
+
+        Os comentários são removidos antes em um único DELETE, evitando o
+        CASCADE linha a linha. Cada lote é commitado separadamente para não
+        segurar locks por muito tempo.
+
+        Se a remoção no storage falhar e `on_storage_error` for informado, ele
+        recebe os public_ids do lote (já removidos do banco) e a exceção é
+        propagada, interrompendo a operação.
+        """
+        db.execute(delete(Comment).where(Comment.document_id.in_(document_ids)))
+        deleted = db.execute(
+            delete(Document)
+            .where(Document.id.in_(document_ids))
+            .returning(Document.id, Document.cloudinary_id)
+        ).all()
+        db.commit()
+
+        for document_id, _ in deleted:
+            delivery_urls.invalidate(document_id)
+
+        public_ids = [cloudinary_id for _, cloudinary_id in deleted if cloudinary_id]
+        try:
+            get_storage().destroy_many(public_ids)
+        except Exception as e:
+            if on_storage_error is None:
+                print(f"Erro ao deletar do Cloudinary: {e}")
+            else:
+                on_storage_error(public_ids, e)
+                raise
+
+        return [document_id for document_id, _ in deleted]
+
+    @staticmethod
+    def bulk_delete_documents(
+        db: Session,
+        document_ids: Sequence[uuid.UUID],
+        batch_size: int = DELETE_BATCH_SIZE,
+    ) -> list[uuid.UUID]:
+        """Deleta vários documentos em lotes e retorna os IDs efetivamente removidos."""
+        document_ids = list(dict.fromkeys(document_ids))
+        deleted = []
+        for start in range(0, len(document_ids), batch_size):
+            deleted.extend(DocumentService._delete_batch(db, document_ids[start:start + batch_size]))
+        return deleted
+
+    @staticmethod
+    def purge_documents(
+        db: Session,
+        older_than: datetime,
+        batch_size: int = DELETE_BATCH_SIZE,
+        on_progress: Callable[[int], None] | None = None,
+        on_storage_error: Callable[[list[str], Exception], None] | None = None,
+    ) -> int:
+        """
+        Remove todos os documentos criados antes de `older_than`, lote a lote.
+
+        `on_progress` recebe o total acumulado de documentos removidos após cada lote.
+        Com `on_storage_error`, uma falha no storage (ex.: cota da Admin API
+        esgotada) é registrada por ele e interrompe o purge em vez de deixar
+        arquivos órfãos sem registro.
+        """
+        total = 0
+        while True:
+            document_ids = db.scalars(
+                select(Document.id)
+                .where(Document.created_at < older_than)
+                .order_by(Document.created_at)
+                .limit(batch_size)
+            ).all()
+            if not document_ids:
+                break
+
+            total += len(DocumentService._delete_batch(db, document_ids, on_storage_error))
+            if on_progress:
+                on_progress(total)
+
+        return total
@@ -0,0 +1,57 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+from config import settings
+
+
+def check_secret() -> None:
+    """Falha se nenhum segredo estiver configurado; sem ele, qualquer um forjaria assinaturas."""
+    if not settings.signing_secret:
+        raise RuntimeError("Configure SIGNING_SECRET (ou CLOUDNARY_API_SECRET) para assinar URLs e tokens")
+
+
+def _digest(message: bytes) -> str:
+    check_secret()
+    key = settings.signing_secret.encode()
+    signature = hmac.new(key, message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(signature).rstrip(b"=").decode()
+
+
+def sign_value(purpose: str, value: str) -> str:
+    """
+    Assina uma string com o segredo da aplicação.
+
+    O `purpose` entra na mensagem assinada, então uma assinatura emitida para
+    um uso (ex.: download) não é aceita em outro (ex.: upload).
+    """
+    return _digest(f"{purpose}:{value}".encode())
+
+
+def verify_value(purpose: str, value: str, signature: str) -> bool:
+    return hmac.compare_digest(sign_value(purpose, value), signature)
+
+
+def sign(payload: dict, expires_at: int) -> str:
+    """Gera um token assinado com o payload e a data de expiração (epoch)."""
+    body = json.dumps({**payload, "exp": expires_at}, separators=(",", ":"), default=str)
+    encoded = base64.urlsafe_b64encode(body.encode()).rstrip(b"=").decode()
+    return f"{encoded}.{sign_value('token', encoded)}"
+
+
+def verify(token: str) -> dict | None:
+    """Valida assinatura e expiração do token, retornando o payload ou None."""
+    encoded, _, signature = token.partition(".")
+    if not signature or not verify_value("token", encoded, signature):
+        return None
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)))
+    except ValueError:
+        return None
+
+    if payload.get("exp", 0) < time.time():
+        return None
+    return payload
@@ -0,0 +1,279 @@
+import shutil
+import time
+from functools import cache
+from pathlib import Path
+from typing import BinaryIO, Protocol
+from types import ModuleType
+
+from config import settings
+from . import signing
+
+
+# Limite do Cloudinary para delete_resources por chamada
+DESTROY_BATCH_SIZE = 100
+
+# Tamanho das partes enviadas ao Cloudinary em uploads grandes
+UPLOAD_CHUNK_SIZE = 20 * 1024 * 1024
+
+# Presets de entrega: miniatura, visualização no navegador e download
+DELIVERY_PRESETS = ("thumbnail", "preview", "attachment")
+
+# Tipo de entrega dos arquivos novos no Cloudinary: só acessíveis por URL assinada.
+# Arquivos antigos continuam como "upload" (públicos).
+CLOUDINARY_DELIVERY_TYPE = "authenticated"
+
+# Miniatura de 320x320; PDFs viram um JPG da primeira página
+THUMBNAIL_OPTIONS = {"width": 320, "height": 320, "crop": "fill", "page": 1, "format": "jpg"}
+
+
+class Storage(Protocol):
+    def upload(self, content: bytes, public_id: str, file_extension: str) -> dict: ...
+    def upload_file(self, path: str, public_id: str, file_extension: str) -> dict: ...
+    def destroy(self, public_id: str, resource_type: str = "image") -> None: ...
+    def destroy_many(self, public_ids: list[str], resource_type: str = "image") -> None: ...
+    def delivery_url(self, locator: str, file_type: str, preset: str, expires_at: int) -> str: ...
+    def create_upload_ticket(self, public_id: str, file_extension: str, expires_at: int) -> dict: ...
+    def get_resource(self, public_id: str, resource_type: str = "image") -> dict | None: ...
+
+
+class CloudinaryStorage:
+    """
+    Storage no Cloudinary. Os arquivos são enviados como `authenticated`, então
+    a URL pública do `upload` não existe e todo acesso passa por `delivery_url`.
+
+    O `secure_url` devolvido (e salvo em `file_path`) é um localizador
+    `cloudinary://<tipo>/<public_id>`, não uma URL utilizável.
+    """
+
+    @staticmethod
+    def locator(public_id: str, delivery_type: str = CLOUDINARY_DELIVERY_TYPE) -> str:
+        return f"cloudinary://{delivery_type}/{public_id}"
+
+    @staticmethod
+    def parse_locator(locator: str) -> tuple[str, str]:
+        """Separa o localizador em (tipo de entrega, public_id)."""
+        delivery_type, _, public_id = locator.removeprefix("cloudinary://").partition("/")
+        return delivery_type, public_id
+
+    @staticmethod
+    @cache
+    def get_client() -> ModuleType:
+        """
+        Importa e configura o SDK do Cloudinary no primeiro uso.
+
+        Adiar o import evita que workers, Alembic e scripts paguem esse custo
+        no startup quando não vão acessar o storage.
+        """
+        import cloudinary
+        import cloudinary.api
+        import cloudinary.exceptions
+        import cloudinary.uploader
+        import cloudinary.utils
+
+        cloudinary.config(
+            cloud_name=settings.cloudinary_cloud_name,
+            api_key=settings.cloudinary_api_key,
+            api_secret=settings.cloudinary_api_secret
+        )
+        return cloudinary
+
+    def upload(self, content: bytes, public_id: str, file_extension: str) -> dict:
+        """Envia o conteúdo para o Cloudinary e retorna o resultado do upload."""
+        result = self.get_client().uploader.upload(
+            content,
+            public_id=public_id,
+            resource_type="image",
+            type=CLOUDINARY_DELIVERY_TYPE,
+            folder="documents",
+            format=file_extension
+        )
+        return {**result, "secure_url": self.locator(result["public_id"])}
+
+    def upload_file(self, path: str, public_id: str, file_extension: str) -> dict:
+        """Envia um arquivo do disco em partes, sem carregá-lo inteiro em memória."""
+        result = self.get_client().uploader.upload_large(
+            path,
+            public_id=public_id,
+            resource_type="image",
+            type=CLOUDINARY_DELIVERY_TYPE,
+            folder="documents",
+            format=file_extension,
+            chunk_size=UPLOAD_CHUNK_SIZE
+        )
+        return {**result, "secure_url": self.locator(result["public_id"])}
+
+    def destroy(self, public_id: str, resource_type: str = "image") -> None:
+        """Remove um arquivo do Cloudinary, seja ele privado ou um arquivo antigo público."""
+        uploader = self.get_client().uploader
+        result = uploader.destroy(
+            public_id=public_id, resource_type=resource_type, type=CLOUDINARY_DELIVERY_TYPE, invalidate=True
+        )
+        if result.get("result") == "not found":
+            uploader.destroy(public_id=public_id, resource_type=resource_type, type="upload", invalidate=True)
+
+    def destroy_many(self, public_ids: list[str], resource_type: str = "image") -> None:
+        """
+        Remove vários arquivos do Cloudinary, em lotes de até 100 por chamada.
+
+        Os não encontrados como `authenticated` são arquivos antigos públicos e
+        são removidos numa segunda chamada, só quando existirem.
+        """
+        client = self.get_client()
+        for start in range(0, len(public_ids), DESTROY_BATCH_SIZE):
+            result = client.api.delete_resources(
+                public_ids[start:start + DESTROY_BATCH_SIZE],
+                resource_type=resource_type,
+                type=CLOUDINARY_DELIVERY_TYPE,
+                invalidate=True
+            )
+            legacy = [public_id for public_id, status in result.get("deleted", {}).items() if status == "not_found"]
+            if legacy:
+                client.api.delete_resources(legacy, resource_type=resource_type, type="upload", invalidate=True)
+
+    def delivery_url(self, locator: str, file_type: str, preset: str, expires_at: int) -> str:
+        """
+        Monta a URL de entrega de um preset.
+
+        `preview` e `attachment` usam a URL de download privado da API, assinada
+        e válida até `expires_at` em qualquer plano. `thumbnail` precisa de
+        transformação: a URL é assinada (o cliente não consegue trocar a
+        transformação nem chegar ao original), mas só expira com
+        CLOUDNARY_AUTH_TOKEN_KEY configurada (token-based auth do Cloudinary).
+        """
+        client = self.get_client()
+        delivery_type, public_id = self.parse_locator(locator)
+
+        if preset != "thumbnail":
+            return client.utils.private_download_url(
+                public_id,
+                file_type,
+                resource_type="image",
+                type=delivery_type,
+                expires_at=expires_at,
+                attachment=preset == "attachment",
+            )
+
+        options = {"resource_type": "image", "type": delivery_type, "secure": True, "sign_url": True}
+        if settings.cloudinary_auth_token_key:
+            options["auth_token"] = {"key": settings.cloudinary_auth_token_key, "expiration": expires_at}
+
+        url, _ = client.utils.cloudinary_url(public_id, **options, **THUMBNAIL_OPTIONS)
+        return url
+
+    def create_upload_ticket(self, public_id: str, file_extension: str, expires_at: int) -> dict:
+        """
+        Gera os parâmetros assinados para o cliente enviar o arquivo direto ao Cloudinary.
+
+        O Cloudinary aceita a assinatura por até 1 hora a partir do timestamp.
+        """
+        client = self.get_client()
+        params = client.utils.sign_request({
+            "public_id": public_id,
+            "type": CLOUDINARY_DELIVERY_TYPE,
+            "folder": "documents",
+            "format": file_extension,
+            "timestamp": int(time.time()),
+        }, {})
+        return {
+            "public_id": f"documents/{public_id}",
+            "upload_url": client.utils.cloudinary_api_url("upload", resource_type="image"),
+            "fields": params,
+        }
+
+    def get_resource(self, public_id: str, resource_type: str = "image") -> dict | None:
+        """Busca os metadados de um arquivo já enviado, ou None se não existir."""
+        client = self.get_client()
+        try:
+            resource = client.api.resource(public_id, resource_type=resource_type, type=CLOUDINARY_DELIVERY_TYPE)
+        except client.exceptions.NotFound:
+            return None
+        return {**resource, "secure_url": self.locator(public_id)}
+
+
+class LocalStorage:
+    """
+    Storage em disco que imita o fluxo do Cloudinary, para desenvolvimento e testes offline.
+
+    Os arquivos são servidos e recebidos pelas rotas em `documents/local_routes.py`,
+    sempre com URL assinada. O `secure_url` devolvido no upload (e salvo em
+    `file_path`) é só um localizador `local://` e não dá acesso ao arquivo.
+    """
+
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, public_id: str) -> Path:
+        path = (self.root / public_id).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError("public_id inválido")
+        return path
+
+    def save(self, public_id: str, stream: BinaryIO) -> None:
+        path = self.path(public_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(stream, f)
+
+    def upload(self, content: bytes, public_id: str, file_extension: str) -> dict:
+        public_id = f"documents/{public_id}.{file_extension}"
+        path = self.path(public_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return {"public_id": public_id, "secure_url": self.locator(public_id)}
+
+    def upload_file(self, path: str, public_id: str, file_extension: str) -> dict:
+        public_id = f"documents/{public_id}.{file_extension}"
+        with open(path, "rb") as f:
+            self.save(public_id, f)
+        return {"public_id": public_id, "secure_url": self.locator(public_id)}
+
+    def destroy(self, public_id: str, resource_type: str = "image") -> None:
+        self.path(public_id).unlink(missing_ok=True)
+
+    def destroy_many(self, public_ids: list[str], resource_type: str = "image") -> None:
+        for public_id in public_ids:
+            self.destroy(public_id, resource_type)
+
+    @staticmethod
+    def locator(public_id: str) -> str:
+        return f"local://{public_id}"
+
+    def delivery_url(self, locator: str, file_type: str, preset: str, expires_at: int) -> str:
+        """URL assinada e com expiração; os presets de transformação são ignorados localmente."""
+        public_id = locator.removeprefix("local://")
+        signature = signing.sign_value("get", f"{public_id}:{expires_at}")
+        url = f"{self.base_url}/storage/local/{public_id}?expires={expires_at}&signature={signature}"
+        if preset == "attachment":
+            url += "&download=true"
+        return url
+
+    def create_upload_ticket(self, public_id: str, file_extension: str, expires_at: int) -> dict:
+        public_id = f"documents/{public_id}.{file_extension}"
+        return {
+            "public_id": public_id,
+            "upload_url": f"{self.base_url}/storage/local/upload/{public_id}",
+            "fields": {
+                "expires": expires_at,
+                "signature": signing.sign_value("put", f"{public_id}:{expires_at}"),
+            },
+        }
+
+    def get_resource(self, public_id: str, resource_type: str = "image") -> dict | None:
+        path = self.path(public_id)
+        if not path.is_file():
+            return None
+        return {
+            "public_id": public_id,
+            "secure_url": self.locator(public_id),
+            "bytes": path.stat().st_size,
+            "format": path.suffix.lstrip("."),
+        }
+
+
+@cache
+def get_storage() -> Storage:
+    """Retorna o backend de storage configurado em STORAGE_BACKEND."""
+    if settings.storage_backend == "local":
+        return LocalStorage(settings.local_storage_dir, settings.public_base_url)
+    return CloudinaryStorage()
@@ -0,0 +1,236 @@
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from typing import AsyncIterator, BinaryIO, Iterator
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from .models import Document
+from .services import ALLOWED_TYPES, DocumentService
+from .storage import get_storage
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Sessões sem atividade por mais tempo que isso são descartadas
+UPLOAD_SESSION_TTL = 24 * 60 * 60
+
+# No Windows o lock é de região e obrigatório; trava-se um byte bem além do fim
+# do arquivo para não bloquear a leitura do conteúdo por outros handles
+WINDOWS_LOCK_OFFSET = 2 ** 40
+
+
+def _try_lock(f: BinaryIO) -> bool:
+    """Tenta um lock exclusivo e não bloqueante no arquivo, valendo entre processos."""
+    try:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(WINDOWS_LOCK_OFFSET)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(f: BinaryIO) -> None:
+    # O flock é liberado ao fechar o arquivo; no Windows é preciso destravar antes
+    if not fcntl:
+        f.seek(WINDOWS_LOCK_OFFSET)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class UploadSessionService:
+    """
+    Uploads retomáveis no estilo tus.
+
+    Cada sessão é um par de arquivos no diretório de spool: `<id>.json` com os
+    metadados e `<id>.part` com os bytes recebidos. O offset da sessão é o
+    tamanho do `.part`, então ele sobrevive a reinícios e é visto por todos os
+    workers da mesma máquina.
+    """
+
+    @staticmethod
+    def _paths(session_id: uuid.UUID) -> tuple[str, str]:
+        base = os.path.join(settings.upload_spool_dir, str(session_id))
+        return f"{base}.json", f"{base}.part"
+
+    @staticmethod
+    @contextmanager
+    def _locked(session_id: uuid.UUID) -> Iterator[BinaryIO]:
+        """
+        Abre o `.part` com um lock exclusivo, compartilhado entre os workers.
+
+        Se outra requisição já está gravando ou finalizando a sessão, responde
+        423 em vez de esperar.
+        """
+        _, part_path = UploadSessionService._paths(session_id)
+        try:
+            f = open(part_path, "r+b")
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+
+        with f:
+            if not _try_lock(f):
+                raise HTTPException(status_code=423, detail="Sessão de upload em uso por outra requisição")
+            try:
+                yield f
+            finally:
+                _unlock(f)
+
+    @staticmethod
+    def _set_finalizing(session_id: uuid.UUID, session: dict, finalizing: bool) -> None:
+        meta_path, _ = UploadSessionService._paths(session_id)
+        session = {key: value for key, value in session.items() if key != "offset"}
+        with open(meta_path, "w") as f:
+            json.dump({**session, "finalizing": finalizing}, f)
+
+    @staticmethod
+    def _remove(session_id: uuid.UUID) -> None:
+        for path in UploadSessionService._paths(session_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _cleanup_expired() -> None:
+        """Remove sessões abandonadas do diretório de spool."""
+        cutoff = time.time() - UPLOAD_SESSION_TTL
+        for entry in os.scandir(settings.upload_spool_dir):
+            if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                UploadSessionService._remove(uuid.UUID(entry.name.removesuffix(".json")))
+
+    @staticmethod
+    def get_session(session_id: uuid.UUID) -> dict:
+        """Carrega a sessão com o offset atual, ou 404 se não existir."""
+        meta_path, part_path = UploadSessionService._paths(session_id)
+        try:
+            with open(meta_path) as f:
+                session = json.load(f)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+
+        session["offset"] = os.path.getsize(part_path)
+        return session
+
+    @staticmethod
+    def create_session(
+        db: Session,
+        title: str,
+        description: str | None,
+        content_type: str,
+        length: int,
+    ) -> dict:
+        """Abre uma sessão de upload retomável para um arquivo de `length` bytes."""
+        if db.scalar(select(exists().where(Document.title == title))):
+            raise HTTPException(status_code=409, detail="Título já existe")
+
+        if content_type not in ALLOWED_TYPES:
+            raise HTTPException(status_code=400, detail="Tipo não permitido. Use PDF, PNG ou JPG")
+
+        if length > settings.max_resumable_file_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Arquivo muito grande (máx {settings.max_resumable_file_size // (1024 * 1024)}MB)"
+            )
+
+        os.makedirs(settings.upload_spool_dir, exist_ok=True)
+        UploadSessionService._cleanup_expired()
+
+        session_id = uuid.uuid4()
+        session = {
+            "session_id": str(session_id),
+            "title": title,
+            "description": description,
+            "file_type": ALLOWED_TYPES[content_type],
+            "length": length,
+        }
+        meta_path, part_path = UploadSessionService._paths(session_id)
+        open(part_path, "wb").close()
+        with open(meta_path, "w") as f:
+            json.dump(session, f)
+
+        return {**session, "offset": 0}
+
+    @staticmethod
+    async def append_chunk(session_id: uuid.UUID, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """
+        Grava um trecho do arquivo a partir de `offset` e retorna o novo offset.
+
+        O corpo é escrito no disco à medida que chega, sem ser acumulado em
+        memória. O offset precisa ser igual ao já recebido; se a conexão cair,
+        os bytes gravados até ali são mantidos e o cliente continua do offset
+        informado pelo HEAD.
+        """
+        session = await run_in_threadpool(UploadSessionService.get_session, session_id)
+        if session.get("finalizing"):
+            raise HTTPException(status_code=409, detail="Upload já está sendo finalizado")
+
+        meta_path, _ = UploadSessionService._paths(session_id)
+        written = offset
+        with UploadSessionService._locked(session_id) as f:
+            # O offset só é confiável depois do lock
+            current = os.fstat(f.fileno()).st_size
+            if offset != current:
+                raise HTTPException(status_code=409, detail=f"Offset esperado: {current}")
+
+            f.seek(offset)
+            async for chunk in chunks:
+                written += len(chunk)
+                if written > session["length"]:
+                    f.truncate(offset)
+                    raise HTTPException(status_code=413, detail="Trecho excede o tamanho declarado")
+                await run_in_threadpool(f.write, chunk)
+
+        # Atualiza o mtime para que sessões ativas não sejam descartadas
+        os.utime(meta_path)
+        return written
+
+    @staticmethod
+    def finalize_session(db: Session, session_id: uuid.UUID) -> Document:
+        """
+        Envia o arquivo completo ao storage e persiste o documento.
+
+        O lock da sessão fica retido até o fim, então finalizações simultâneas
+        não geram documentos duplicados. A sessão é marcada como `finalizing`
+        antes do envio para que novos PATCH sejam recusados; em caso de erro a
+        marca é desfeita e o cliente pode tentar de novo.
+        """
+        with UploadSessionService._locked(session_id):
+            session = UploadSessionService.get_session(session_id)
+            if session["offset"] != session["length"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload incompleto ({session['offset']} de {session['length']} bytes)"
+                )
+
+            if db.scalar(select(exists().where(Document.title == session["title"]))):
+                raise HTTPException(status_code=409, detail="Título já existe")
+
+            UploadSessionService._set_finalizing(session_id, session, True)
+            try:
+                _, part_path = UploadSessionService._paths(session_id)
+                upload_result = get_storage().upload_file(part_path, str(session_id), session["file_type"])
+
+                document = DocumentService._save_document(
+                    db, session["title"], session["description"], session["file_type"], upload_result
+                )
+            except BaseException:
+                UploadSessionService._set_finalizing(session_id, session, False)
+                raise
+
+        # Fora do lock: no Windows não é possível remover um arquivo aberto
+        UploadSessionService._remove(session_id)
+        return document
@@ -0,0 +1,34 @@
+from typing import Collection
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+
+def parse_list(value: str | None, allowed: Collection[str], label: str) -> list[str] | None:
+    """
+    Interpreta um parâmetro de query com uma lista separada por vírgulas.
+
+    Retorna None quando o parâmetro não foi informado. Itens repetidos são
+    ignorados; itens fora de `allowed` (ou uma lista vazia) geram 422.
+    """
+    if not value:
+        return None
+
+    requested = list(dict.fromkeys(item.strip() for item in value.split(",") if item.strip()))
+    unknown = [item for item in requested if item not in allowed]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{label} inválidos: {', '.join(unknown) or value}. Disponíveis: {', '.join(allowed)}"
+        )
+    return requested
+
+
+def parse_fields(fields: str | None, schema: type[BaseModel]) -> list[str] | None:
+    """
+    Interpreta o parâmetro `fields=` de uma listagem.
+
+    Retorna None quando o parâmetro não foi informado, para que a resposta
+    completa seja usada.
+    """
+    return parse_list(fields, schema.model_fields, "Campos")
@@ -1,9 +1,33 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from brotli_asgi import BrotliMiddleware
+from config import settings
+from database import get_engine, warm_up_pool
+from documents import signing
 from documents.routes import router as document_router
 from comments.routes import router as comment_router
+from singleflight import reads
 
-app = FastAPI(title="RMH Backend API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    signing.check_secret()
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(warm_up_pool, settings.db_pool_warmup)
+    except Exception as e:
+        print(f"Erro ao aquecer o pool de conexões: {e}")
+    print(f"Startup concluído em {time.perf_counter() - started:.2f}s")
+
+    yield
+
+    get_engine().dispose()
+
+
+app = FastAPI(title="RMH Backend API", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -11,10 +35,22 @@ app.add_middleware(
     allow_methods=["*"], 
     allow_headers=["*"],
 )
+# Respostas em br ou gzip, conforme o Accept-Encoding. Os arquivos servidos pelo
+# storage local (PDF, PNG, JPG) já são comprimidos e ficam de fora.
+app.add_middleware(
+    BrotliMiddleware,
+    minimum_size=settings.compression_min_size,
+    gzip_fallback=True,
+    excluded_handlers=[r"^/storage/local/"],
+)
 
 app.include_router(document_router)
 app.include_router(comment_router)
 
+if settings.storage_backend == "local":
+    from documents.local_routes import router as local_storage_router
+    app.include_router(local_storage_router)
+
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok", "coalesced_reads": reads.stats()}
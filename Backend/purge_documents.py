@@ -0,0 +1,92 @@
+"""
+Purge de documentos por política de retenção.
+
+Remove documentos (e seus comentários e arquivos) criados há mais de N dias,
+em lotes pequenos para não segurar locks longos.
+
+Se a remoção dos arquivos no storage falhar (ex.: cota da Admin API do
+Cloudinary esgotada), os public_ids do lote, já removidos do banco, são
+gravados no arquivo de órfãos e o purge para. Depois, reenvie a remoção com
+--retry-orphans antes de continuar.
+
+Uso:
+    python purge_documents.py --older-than-days 365 [--batch-size 500]
+    python purge_documents.py --retry-orphans
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from database import new_session
+from documents.services import DELETE_BATCH_SIZE, DocumentService
+from documents.storage import get_storage
+
+
+def _record_orphans(orphans_path: str, public_ids: list[str]) -> None:
+    with open(orphans_path, "a", encoding="utf-8") as f:
+        for public_id in public_ids:
+            f.write(f"{public_id}\n")
+
+
+def _retry_orphans(orphans_path: str) -> bool:
+    """Tenta remover do storage os arquivos registrados; mantém no arquivo os que falharem."""
+    if not os.path.exists(orphans_path):
+        print("Nenhum arquivo órfão registrado")
+        return True
+
+    with open(orphans_path, encoding="utf-8") as f:
+        public_ids = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+    try:
+        get_storage().destroy_many(public_ids)
+    except Exception as e:
+        print(f"Erro ao deletar do storage: {e}. Os {len(public_ids)} arquivos continuam em {orphans_path}")
+        return False
+
+    os.remove(orphans_path)
+    print(f"{len(public_ids)} arquivos órfãos removidos do storage")
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Remove documentos mais antigos que a retenção")
+    parser.add_argument("--older-than-days", type=int)
+    parser.add_argument("--batch-size", type=int, default=DELETE_BATCH_SIZE)
+    parser.add_argument(
+        "--orphans-file",
+        default="purge_orphans.txt",
+        help="Arquivo com os public_ids cuja remoção no storage falhou",
+    )
+    parser.add_argument("--retry-orphans", action="store_true", help="Reenvia a remoção dos arquivos órfãos")
+    args = parser.parse_args()
+
+    if args.retry_orphans:
+        sys.exit(0 if _retry_orphans(args.orphans_file) else 1)
+    if args.older_than_days is None:
+        parser.error("--older-than-days é obrigatório")
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=args.older_than_days)
+    started = time.monotonic()
+
+    def report(total: int) -> None:
+        elapsed = time.monotonic() - started
+        print(f"{total} documentos removidos ({total / elapsed:.0f} docs/s)")
+
+    def on_storage_error(public_ids: list[str], error: Exception) -> None:
+        _record_orphans(args.orphans_file, public_ids)
+        print(f"Erro ao deletar do storage: {error}")
+        print(f"{len(public_ids)} public_ids gravados em {args.orphans_file}; rode com --retry-orphans")
+
+    print(f"Removendo documentos criados antes de {cutoff.isoformat()}")
+    with new_session() as db:
+        total = DocumentService.purge_documents(
+            db, cutoff, args.batch_size, on_progress=report, on_storage_error=on_storage_error
+        )
+
+    print(f"Concluído: {total} documentos removidos em {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
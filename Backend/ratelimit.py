@@ -0,0 +1,191 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import cache
+from typing import Callable, Protocol
+
+from fastapi import HTTPException, Request
+
+from config import settings
+
+
+class BucketStore(Protocol):
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Consome um token; retorna 0 se permitido ou os segundos até o próximo token."""
+        ...
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: int) -> float:
+    return min(burst, tokens + (now - updated) * rate)
+
+
+class InMemoryBucketStore:
+    """Token buckets no processo; cada worker tem seus próprios limites."""
+
+    # Acima disso, buckets já cheios são descartados para não crescer sem limite
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Cada bucket guarda a própria taxa, já que escopos diferentes têm limites diferentes
+        self._buckets: dict[str, tuple[float, float, float, int]] = {}
+
+    def _prune(self, now: float) -> None:
+        self._buckets = {
+            key: (tokens, updated, rate, burst)
+            for key, (tokens, updated, rate, burst) in self._buckets.items()
+            if _refill(tokens, updated, now, rate, burst) < burst
+        }
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune(now)
+
+            tokens, updated, _, _ = self._buckets.get(key, (burst, now, rate, burst))
+            tokens = _refill(tokens, updated, now, rate, burst)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, rate, burst)
+                return (1 - tokens) / rate
+
+            self._buckets[key] = (tokens - 1, now, rate, burst)
+            return 0
+
+
+class SqliteBucketStore:
+    """
+    Token buckets em um arquivo SQLite, compartilhados entre os workers da mesma máquina.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(*row, now, rate, burst) if row else burst
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return wait
+
+
+@cache
+def get_bucket_store() -> BucketStore:
+    """Retorna o store configurado em RATE_LIMIT_STORE (memory ou sqlite)."""
+    if settings.rate_limit_store == "sqlite":
+        return SqliteBucketStore(settings.rate_limit_sqlite_path)
+    return InMemoryBucketStore()
+
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Muitas requisições. Tente novamente em instantes",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def client_ip(request: Request) -> str:
+    """
+    IP do cliente usado como chave dos limites.
+
+    Atrás de um proxy (ex.: Render), `request.client` é o endereço do proxy e
+    todos os clientes dividiriam o mesmo bucket. Com CLIENT_IP_HEADER
+    configurado, usa o último valor do header: o que o proxy confiável
+    acrescentou, e não os que o cliente pode ter forjado antes dele.
+    """
+    if settings.client_ip_header:
+        forwarded = request.headers.get(settings.client_ip_header)
+        if forwarded:
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(scope: str, per_minute: int, burst: int) -> Callable[[Request], None]:
+    """
+    Cria uma dependência que limita as requisições por IP do cliente (ver `client_ip`).
+    """
+    if per_minute <= 0 or burst < 1:
+        raise ValueError(f"Limite inválido para '{scope}': per_minute deve ser > 0 e burst >= 1")
+    rate = per_minute / 60
+
+    def dependency(request: Request) -> None:
+        wait = get_bucket_store().take(f"{scope}:{client_ip(request)}", rate, burst)
+        if wait:
+            raise _too_many_requests(wait)
+
+    return dependency
+
+
+class ConcurrencyLimiter:
+    """
+    Limita quantas requisições de um tipo rodam ao mesmo tempo no worker.
+
+    Excedido o limite, a requisição espera na fila por até `queue_timeout`
+    segundos; com a fila cheia ou o tempo esgotado, responde 429. Assim os
+    uploads não ocupam todas as threads e as leituras continuam sendo atendidas.
+    """
+
+    def __init__(self, limit: int, queue_timeout: float, max_queued: int):
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self.queue_timeout = queue_timeout
+        self.max_queued = max_queued
+
+    def slot(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self._queued >= self.max_queued:
+                    raise _too_many_requests(self.queue_timeout)
+                self._queued += 1
+            try:
+                acquired = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self._queued -= 1
+            if not acquired:
+                raise _too_many_requests(self.queue_timeout)
+
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+
+limit_uploads = rate_limit("uploads", settings.upload_rate_per_minute, settings.upload_burst)
+limit_comments = rate_limit("comments", settings.comment_rate_per_minute, settings.comment_burst)
+upload_limiter = ConcurrencyLimiter(
+    settings.max_concurrent_uploads,
+    settings.upload_queue_timeout,
+    settings.max_queued_uploads,
+)
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas idênticas e simultâneas em uma única execução.
+
+    Enquanto a primeira chamada para uma chave está em andamento, as demais
+    esperam e recebem o mesmo resultado (ou a mesma exceção). Nada é guardado
+    depois que a chamada termina: isto não é um cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._async_calls: dict[Hashable, asyncio.Future] = {}
+        self._calls_total = 0
+        self._executions = 0
+
+    def _count(self, leader: bool) -> None:
+        self._calls_total += 1
+        if leader:
+            self._executions += 1
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Executa `fn` uma vez por chave entre as threads que chegarem ao mesmo tempo."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count(leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Versão para corrotinas, agrupando as chamadas do mesmo event loop.
+
+        `fn` roda em uma task própria, da qual todos os chamadores esperam via
+        `shield`: se um deles for cancelado (ex.: o cliente desconectou), os
+        demais continuam esperando o mesmo resultado.
+        """
+        task = self._async_calls.get(key)
+        with self._lock:
+            self._count(task is None)
+
+        if task is None:
+            task = self._async_calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._finish_async(key, done))
+        return await asyncio.shield(task)
+
+    def _finish_async(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._async_calls.get(key) is task:
+            del self._async_calls[key]
+        # Evita o aviso de exceção não consumida quando todos os chamadores saíram
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self._calls_total,
+                "executions": self._executions,
+                "coalesced": self._calls_total - self._executions,
+            }
+
+
+# Instância compartilhada pelas leituras quentes de documentos e comentários
+reads = SingleFlight()
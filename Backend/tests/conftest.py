@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+# Os módulos do backend são importados pelo nome, a partir de Backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("SIGNING_SECRET", "test-secret")
@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import ratelimit
+from ratelimit import ConcurrencyLimiter, InMemoryBucketStore, SqliteBucketStore, client_ip, rate_limit
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(ratelimit.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, clock):
+    if request.param == "sqlite":
+        return SqliteBucketStore(str(tmp_path / "buckets.sqlite3"))
+    return InMemoryBucketStore()
+
+
+def test_take_allows_burst_then_reports_wait(store):
+    assert [store.take("k", rate=1, burst=3) for _ in range(3)] == [0, 0, 0]
+    assert store.take("k", rate=1, burst=3) == pytest.approx(1)
+
+
+def test_take_refills_over_time(store, clock):
+    store.take("k", rate=0.5, burst=1)
+    assert store.take("k", rate=0.5, burst=1) == pytest.approx(2)
+    clock[0] += 2
+    assert store.take("k", rate=0.5, burst=1) == 0
+
+
+def test_buckets_are_independent_per_key(store):
+    store.take("a", rate=1, burst=1)
+    assert store.take("a", rate=1, burst=1) > 0
+    assert store.take("b", rate=1, burst=1) == 0
+
+
+def test_prune_uses_each_bucket_own_rate(clock, monkeypatch):
+    store = InMemoryBucketStore()
+    monkeypatch.setattr(store, "MAX_KEYS", 1)
+    # Escopo lento, ainda esvaziado depois de 1s
+    store.take("lento", rate=0.01, burst=2)
+    # Escopo rápido, cheio de novo depois de 1s
+    store.take("rapido", rate=100, burst=2)
+    clock[0] += 1
+    store.take("outro", rate=100, burst=2)
+
+    assert "lento" in store._buckets
+    assert "rapido" not in store._buckets
+
+
+@pytest.mark.parametrize("per_minute, burst", [(0, 1), (-1, 1), (10, 0)])
+def test_rate_limit_rejects_invalid_config(per_minute, burst):
+    with pytest.raises(ValueError):
+        rate_limit("teste", per_minute, burst)
+
+
+def _request(headers: dict[str, str]) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("10.0.0.1", 1234),
+    })
+
+
+def test_client_ip_uses_connection_without_header(monkeypatch):
+    monkeypatch.setattr(ratelimit.settings, "client_ip_header", None)
+    assert client_ip(_request({"X-Forwarded-For": "1.2.3.4"})) == "10.0.0.1"
+
+
+def test_client_ip_uses_last_value_added_by_proxy(monkeypatch):
+    monkeypatch.setattr(ratelimit.settings, "client_ip_header", "X-Forwarded-For")
+    assert client_ip(_request({"X-Forwarded-For": "6.6.6.6, 1.2.3.4"})) == "1.2.3.4"
+    assert client_ip(_request({})) == "10.0.0.1"
+
+
+def test_concurrency_limiter_rejects_when_queue_is_full():
+    limiter = ConcurrencyLimiter(limit=1, queue_timeout=0.05, max_queued=0)
+    slot = limiter.slot()
+    next(slot)
+
+    with pytest.raises(HTTPException) as error:
+        next(limiter.slot())
+    assert error.value.status_code == 429
+
+    slot.close()
+    next(limiter.slot())
+
+
+def test_concurrency_limiter_times_out_in_queue():
+    limiter = ConcurrencyLimiter(limit=1, queue_timeout=0.05, max_queued=1)
+    slot = limiter.slot()
+    next(slot)
+
+    with pytest.raises(HTTPException) as error:
+        next(limiter.slot())
+    assert error.value.status_code == 429
+    assert limiter._queued == 0
+    slot.close()
+
+
+def test_concurrency_limiter_hands_slot_to_queued_request():
+    limiter = ConcurrencyLimiter(limit=1, queue_timeout=5, max_queued=1)
+    slot = limiter.slot()
+    next(slot)
+
+    acquired = threading.Event()
+
+    def queued():
+        waiting = limiter.slot()
+        next(waiting)
+        acquired.set()
+        waiting.close()
+
+    thread = threading.Thread(target=queued)
+    thread.start()
+    assert not acquired.wait(0.1)
+    slot.close()
+    assert acquired.wait(5)
+    thread.join()
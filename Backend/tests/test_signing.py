@@ -0,0 +1,22 @@
+import time
+
+from documents import signing
+
+
+def test_signature_is_bound_to_its_purpose():
+    signature = signing.sign_value("get", "documents/a.pdf:123")
+    assert signing.verify_value("get", "documents/a.pdf:123", signature)
+    assert not signing.verify_value("put", "documents/a.pdf:123", signature)
+
+
+def test_token_roundtrip_and_expiry():
+    token = signing.sign({"document_id": "abc"}, int(time.time()) + 60)
+    assert signing.verify(token)["document_id"] == "abc"
+    assert signing.verify(signing.sign({"document_id": "abc"}, int(time.time()) - 1)) is None
+
+
+def test_token_rejects_tampering():
+    token = signing.sign({"document_id": "abc"}, int(time.time()) + 60)
+    encoded, _, signature = token.partition(".")
+    assert signing.verify(f"{encoded}x.{signature}") is None
+    assert not signing.verify_value("get", encoded, signature)
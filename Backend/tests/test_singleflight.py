@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def _wait_for_calls(flight: SingleFlight, calls: int) -> None:
+    deadline = time.monotonic() + 5
+    while flight.stats()["calls"] < calls:
+        assert time.monotonic() < deadline, "as chamadas não chegaram a tempo"
+        time.sleep(0.01)
+
+
+def test_do_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def fn():
+        executions.append(1)
+        release.wait(5)
+        return "resultado"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("chave", fn))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    _wait_for_calls(flight, 5)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(executions) == 1
+    assert results == ["resultado"] * 5
+    assert flight.stats() == {"calls": 5, "executions": 1, "coalesced": 4}
+
+
+def test_do_shares_exception_with_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise ValueError("falhou")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("chave", fn)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_for_calls(flight, 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+    assert len({id(error) for error in errors}) == 1
+
+
+def test_do_does_not_cache_finished_calls():
+    flight = SingleFlight()
+    assert flight.do("chave", lambda: 1) == 1
+    assert flight.do("chave", lambda: 2) == 2
+    assert flight.stats()["executions"] == 2
+
+
+def test_do_async_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    executions = []
+
+    async def fn():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return "resultado"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("chave", fn) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["resultado"] * 5
+    assert len(executions) == 1
+    assert flight.stats() == {"calls": 5, "executions": 1, "coalesced": 4}
+
+
+def test_do_async_shares_exception_with_followers():
+    flight = SingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.05)
+        raise ValueError("falhou")
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("chave", fn) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["executions"] == 1
+
+
+def test_do_async_leader_cancellation_does_not_cancel_followers():
+    flight = SingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.05)
+        return "resultado"
+
+    async def main():
+        leader = asyncio.create_task(flight.do_async("chave", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do_async("chave", fn))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "resultado"
+    assert flight.stats()["executions"] == 1
+
+
+def test_do_async_releases_key_after_completion():
+    flight = SingleFlight()
+
+    async def main():
+        first = await flight.do_async("chave", lambda: asyncio.sleep(0, result=1))
+        second = await flight.do_async("chave", lambda: asyncio.sleep(0, result=2))
+        return first, second
+
+    assert asyncio.run(main()) == (1, 2)
@@ -105,7 +105,7 @@ async function loadDocuments(page = 1) {
     emptyState.style.display = 'none';
     
     try {
-        const response = await fetch(`${API_URL}/documents/?page=${page}&page_size=9`);
+        const response = await fetch(`${API_URL}/documents/?page=${page}&page_size=9&fields=id,title,description,created_at,file_type`);
         const data = await response.json();
         
         allDocuments = data.documents;
@@ -204,8 +204,9 @@ async function openDocument(documentId) {
     currentDocumentId = documentId;
     
     try {
-        const response = await fetch(`${API_URL}/documents/${documentId}`);
-        const doc = await response.json();
+        const response = await fetch(`${API_URL}/documents/${documentId}/full`);
+        const data = await response.json();
+        const doc = data.document;
         
         modalTitle.textContent = doc.title;
         modalType.textContent = doc.file_type.toUpperCase();
@@ -218,11 +219,11 @@ async function openDocument(documentId) {
             modalDescriptionContainer.style.display = 'none';
         }
         
-        viewBtn.onclick = () => window.open(`${API_URL}/documents/${documentId}/view`, '_blank');
-        downloadBtn.onclick = () => window.location.href = `${API_URL}/documents/${documentId}/download`;
+        viewBtn.onclick = () => window.open(data.view_url, '_blank');
+        downloadBtn.onclick = () => window.location.href = data.download_url;
         deleteBtn.onclick = () => handleDelete(documentId);
         
-        loadComments(documentId);
+        renderComments(data.comments, data.comment_total);
         modal.classList.add('show');
     } catch (error) {
         showToast('Erro ao carregar documento', 'error');
@@ -242,25 +243,30 @@ async function loadComments(documentId) {
         const response = await fetch(`${API_URL}/documents/${documentId}/comments/`);
         const data = await response.json();
         
-        commentsCount.textContent = data.total;
-        
-        if (data.comments.length === 0) {
-            commentsList.innerHTML = '';
-            commentsEmpty.style.display = 'block';
-        } else {
-            commentsEmpty.style.display = 'none';
-            commentsList.innerHTML = data.comments.map(comment => `
-                <div class="comment-item">
-                    <div class="comment-date">${formatDate(comment.created_at)}</div>
-                    <div class="comment-content">${escapeHtml(comment.content)}</div>
-                </div>
-            `).join('');
-        }
+        renderComments(data.comments, data.total);
     } catch (error) {
         showToast('Erro ao carregar comentários', 'error');
     }
 }
 
+// Render comments
+function renderComments(comments, total) {
+    commentsCount.textContent = total;
+    
+    if (comments.length === 0) {
+        commentsList.innerHTML = '';
+        commentsEmpty.style.display = 'block';
+    } else {
+        commentsEmpty.style.display = 'none';
+        commentsList.innerHTML = comments.map(comment => `
+            <div class="comment-item">
+                <div class="comment-date">${formatDate(comment.created_at)}</div>
+                <div class="comment-content">${escapeHtml(comment.content)}</div>
+            </div>
+        `).join('');
+    }
+}
+
 // Submit comment
 async function handleCommentSubmit(e) {
     e.preventDefault();